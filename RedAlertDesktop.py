@@ -1,95 +1,62 @@
-import requests
-import time
-import json
-import logging
 from datetime import datetime
-import pytz
-import re
 import tkinter as tk
 from tkinter import messagebox
+from alert_poller import AlertPoller, setup_logging, TZ
 
-logging.basicConfig(
-    filename="alerts.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s",
-    filemode="a",
-)
+setup_logging("alerts.log")
 
-ALLOWED_AREAS = {
+ALLOWED_AREAS = frozenset({
     "תל אביב - דרום העיר ויפו",
     "תל אביב - מזרח",
     "תל אביב - מרכז העיר",
     "תל אביב - עבר הירקון"
-}
+})
 
-def show_popup(message_text):
-    root = tk.Tk()
-    root.withdraw()  # הסתר את חלון הטופ
-    root.attributes("-topmost", True)
-    messagebox.showinfo("📢 התרעת פיקוד העורף", message_text)
-    root.destroy()
-
-def check_alerts():
-    print("בודק התראות...")
-    url = "https://www.oref.org.il/WarningMessages/alert/alerts.json"
-    headers = {"User-Agent": "Mozilla/5.0"}
-
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        text = response.content.decode('utf-8-sig')
-
-        with open("last_alert_raw.json", "w", encoding="utf-8") as f:
-            f.write(text)
-
-        if text.strip() in ("", "\n", "\n\n"):
-            print("🟩 אין התראה חדשה (תגובה ריקה).")
-            return None
-
-        if not (text.startswith('[') or text.startswith('{')):
-            print("⚠️ תשובה לא תקינה:", text[:50])
-            return None
-
-        logging.info(f"התקבלה התרעה חדשה:\n{text}")
-        data = json.loads(text)
+# חלון שורש אחד מוסתר לכל חיי התוכנית – יצירת Tk חדש בכל התראה איטית
+ROOT = tk.Tk()
+ROOT.withdraw()  # הסתר את חלון הטופ
+ROOT.attributes("-topmost", True)
 
-        title = data.get("title", "")
-        desc = data.get("desc", "")
-        alerts = data.get("data", [])
-
-        matched_areas = [a for a in alerts if a in ALLOWED_AREAS]
-
-        if matched_areas:
-            print("התראה רלוונטית")
-
-            tz = pytz.timezone("Asia/Jerusalem")
-            now_str = datetime.now(tz).strftime("%H:%M")
+def show_popup(message_text):
+    messagebox.showinfo("📢 התרעת פיקוד העורף", message_text, parent=ROOT)
 
-            clean_title = re.sub(r'[\r\n]+', ' ', title).strip()
-            clean_desc = re.sub(r'[\r\n]+', ' ', desc).strip()
+def alert_message(alert):
+    now_str = datetime.now(TZ).strftime("%H:%M")
+    return f"📢 התרעת פיקוד העורף: {alert.title}\n\nהנחיה: {alert.desc}\n\n⏰ נשלח בשעה {now_str}"
 
-            subject = f"📢 התרעת פיקוד העורף: {clean_title}\n\nהנחיה: {clean_desc}\n\n⏰ נשלח בשעה {now_str}"
+# שניות בין תחילת בדיקה אחת לתחילת הבאה
+POLL_INTERVAL = 1
+# אחרי התראה ממתינים לפני הבדיקה הבאה, כדי לא להקפיץ שוב את אותה התראה
+ALERT_COOLDOWN = 100
 
-            show_popup(subject)
-            return "alert"
+def poll(poller):
+    delay = poller.time_until_next()
+    rearm = True
+    try:
+        alert = poller.poll_once()
+        if alert:
+            delay = ALERT_COOLDOWN
+            show_popup(alert_message(alert))
         else:
-            print("🔕 התראה לא רלוונטית.")
-            return None
-
-    except Exception as e:
-        print(f"שגיאה בבדיקת התראות: {e}")
-        return None
+            delay = poller.time_until_next()
+    except KeyboardInterrupt:
+        # Tk בולע חריגות מתוך after, ולחלון המוסתר אין כפתור סגירה –
+        # לכן Ctrl+C עוצר כאן את הלולאה בעצמו
+        rearm = False
+        ROOT.quit()
+    finally:
+        # הבדיקה הבאה מתוזמנת בלולאת האירועים של Tk, במקום time.sleep –
+        # גם אם הצגת ההתראה נכשלה, כדי שהבדיקות לא ייעצרו
+        if rearm:
+            ROOT.after(int(delay * 1000), poll, poller)
 
 def main():
-    last_alert = ""
-    while True:
-        alert = check_alerts()
-        if alert and alert != last_alert:
-            print(f"התראה חדשה: {alert}")
-            last_alert = alert
-            time.sleep(100)
-        else:
-            print("אין התראה חדשה.")
-        time.sleep(1)
+    poller = AlertPoller(ALLOWED_AREAS, interval=POLL_INTERVAL)
+    ROOT.after(0, poll, poller)
+    try:
+        ROOT.mainloop()
+    finally:
+        poller.close()
 
 if __name__ == "__main__":
     main()
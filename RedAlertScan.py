@@ -1,34 +1,83 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
-import json
+import orjson
+import codecs
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
+import os
 
-logging.basicConfig(
-    filename="alerts.log",      # הקובץ שאליו נרשמים הלוגים
-    level=logging.INFO,         # רמת הלוג – INFO ומעלה
-    format="%(asctime)s %(levelname)s: %(message)s",  # פורמט עם זמן ורמה
-    filemode="a",               # מצב append – לא מוחק קיים
-)
+# הלוגים נכתבים לקובץ דרך תור, כך שהכתיבה לדיסק נעשית ב-thread נפרד ולא בלולאת הבדיקה
+file_handler = logging.FileHandler("alerts.log", mode="a", encoding="utf-8")  # מצב append – לא מוחק קיים
+file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))  # פורמט עם זמן ורמה
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler)
+logging.getLogger().setLevel(logging.INFO)  # רמת הלוג – INFO ומעלה
+logging.getLogger().addHandler(QueueHandler(log_queue))
+log_listener.start()
+atexit.register(log_listener.stop)
 
+# חיבור אחד שנשמר פתוח (keep-alive) לכל הבקשות, במקום לחיצת TLS חדשה בכל בדיקה
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+
+
+# REDALERT_DEBUG=1 מדפיס גם את ההודעות שחוזרות בכל בדיקה
+DEBUG = bool(os.environ.get("REDALERT_DEBUG"))
+
+# ETag / Last-Modified של התשובה האחרונה, לבקשות מותנות
+last_etag = None
+last_modified = None
+# גוף התשובה האחרונה, כדי לא לפענח שוב תוכן זהה
+last_body = None
 
 def check_alerts():
-    print("בודק התראות...")
+    global last_etag, last_modified, last_body
+    if DEBUG:
+        print("בודק התראות...")
     url = "https://www.oref.org.il/WarningMessages/alert/alerts.json"
-    headers = {"User-Agent": "Mozilla/5.0"}
+    headers = {}
+    # שולחים את המזהים מהתשובה הקודמת – אם הקובץ לא השתנה השרת יחזיר 304 בלי גוף
+    if last_etag:
+        headers["If-None-Match"] = last_etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        text = response.content.decode('utf-8-sig')
-        #print(text)
-        if not text:
+        response = SESSION.get(url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            if DEBUG:
+                print("🟩 אין שינוי מאז הבדיקה הקודמת.")
+            return None
+        last_etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        # השוואת bytes בודקת קודם את האורך ורק אז את התוכן
+        if response.content == last_body:
+            if DEBUG:
+                print("🟩 אין שינוי מאז הבדיקה הקודמת.")
+            return None
+        last_body = response.content
+
+        # orjson מפענח bytes ישירות, כך שאין צורך לפענח קודם למחרוזת
+        body = response.content
+        if body.startswith(codecs.BOM_UTF8):
+            body = body[len(codecs.BOM_UTF8):]
+        #print(body)
+        if not body:
             print("🟨 קיבלנו תגובה ריקה")
             return []
-        if not (text.startswith('[') or text.startswith('{')):
-            print("תשובה ריקה:", text[:10])
+        if not body.startswith((b'[', b'{')):
+            print("תשובה ריקה:", body[:10].decode('utf-8', 'replace'))
             return []
 
-        logging.info(f"התקבלה התרעה חדשה:\n{text}")
-        data = json.loads(text)
+        # הפענוח למחרוזת רק כשהלוג באמת נכתב
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("התקבלה התרעה חדשה:\n%s", body.decode('utf-8'))
+        data = orjson.loads(body)
         #print("פורמט JSON:", data)
         titel = data.get("titel", [])
         alerts = data.get("data", [])
@@ -43,16 +92,25 @@ def check_alerts():
     
     return None
 
+# שניות בין תחילת בדיקה אחת לתחילת הבאה
+POLL_INTERVAL = 15
+
 def main():
     last_alert = ""
-    while True:
-        alert = check_alerts()
-        if alert and alert != last_alert:
-            print(f"התראה חדשה: {alert}")
-            last_alert = alert
-        else:
-            print("אין התראה חדשה.")
-        time.sleep(15)
+    try:
+        while True:
+            started = time.monotonic()
+            alert = check_alerts()
+            if alert and alert != last_alert:
+                print(f"התראה חדשה: {alert}")
+                last_alert = alert
+            elif DEBUG:
+                print("אין התראה חדשה.")
+            # זמן הבקשה עצמה מנוכה מההמתנה, כך שבקשה איטית לא מאטה את קצב הבדיקות
+            time.sleep(max(0, POLL_INTERVAL - (time.monotonic() - started)))
+    finally:
+        # סוגר את החיבורים הפתוחים ביציאה מהתוכנית
+        SESSION.close()
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,10 @@
-import requests
-import time
-import json
-import logging
 import smtplib
 from email.message import EmailMessage
 from datetime import datetime
-import pytz
-import re
+from alert_poller import AlertPoller, setup_logging, TZ
 
 
-logging.basicConfig(
-    filename="alerts.log",      # הקובץ שאליו נרשמים הלוגים
-    level=logging.INFO,         # רמת הלוג – INFO ומעלה
-    format="%(asctime)s %(levelname)s: %(message)s",  # פורמט עם זמן ורמה
-    filemode="a",               # מצב append – לא מוחק קיים
-)
+setup_logging("alerts.log")
 
 EMAIL_ADDRESS = 'YOUR_GMAIL'
 EMAIL_PASSWORD = 'YOUR_APP_PASS'
@@ -30,7 +20,35 @@ def load_recipients(file_path="mails.txt"):
         print(f"שגיאה בטעינת רשימת נמענים: {e}")
         return []
 
+# חיבור SMTP פתוח שנשמר בין התראות, כדי לחסוך TLS והתחברות בכל שליחה
+smtp_connection = None
+
+def get_smtp():
+    global smtp_connection
+    if smtp_connection is not None:
+        try:
+            # בדיקה שהחיבור עדיין חי – Gmail סוגר חיבורים שעומדים זמן רב
+            if smtp_connection.noop()[0] == 250:
+                return smtp_connection
+        except (smtplib.SMTPException, OSError):
+            pass
+        try:
+            smtp_connection.close()
+        except Exception:
+            pass
+        smtp_connection = None
+    connection = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+    try:
+        connection.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+    except Exception:
+        connection.close()
+        raise
+    # נשמר לשימוש חוזר רק אחרי התחברות מוצלחת
+    smtp_connection = connection
+    return smtp_connection
+
 def send_email(subject):
+    global smtp_connection
     recipients = load_recipients()
     msg = EmailMessage()
     msg['Subject'] = subject
@@ -39,87 +57,48 @@ def send_email(subject):
     msg.set_content(subject)
 
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            smtp.send_message(msg)
+        get_smtp().send_message(msg)
         print("✉️ המייל נשלח בהצלחה.")
     except Exception as e:
         print(f"שגיאה בשליחת מייל: {e}")
-ALLOWED_AREAS = {
+        # לא משתמשים שוב בחיבור שנכשל – בפעם הבאה ייפתח חיבור חדש
+        if smtp_connection is not None:
+            try:
+                smtp_connection.close()
+            except Exception:
+                pass
+        smtp_connection = None
+ALLOWED_AREAS = frozenset({
     "תל אביב - דרום העיר ויפו",
     "תל אביב - מזרח",
     "תל אביב - מרכז העיר",
     "תל אביב - עבר הירקון"
-}
-
-
-def check_alerts():
-    print("בודק התראות...")
-    url = "https://www.oref.org.il/WarningMessages/alert/alerts.json"
-    headers = {"User-Agent": "Mozilla/5.0"}
-
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        text = response.content.decode('utf-8-sig')
-
-        # שמירת התשובה לקובץ
-        with open("last_alert_raw.json", "w", encoding="utf-8") as f:
-            f.write(text)
-
-        # אם קיבלנו בדיוק שני תווי שורה – אין התראה
-        if text.strip() in ("", "\n", "\n\n"):
-            print("🟩 אין התראה חדשה (תגובה ריקה).")
-            return None
-
-        if not (text.startswith('[') or text.startswith('{')):
-            print("⚠️ תשובה לא תקינה:", text[:50])
-            return None
-
-        logging.info(f"התקבלה התרעה חדשה:\n{text}")
-        data = json.loads(text)
+})
 
-        title = data.get("title", "")
-        desc = data.get("desc", "")
-        alerts = data.get("data", [])
 
-        # סינון לפי אזורים מותרים
-        matched_areas = [a for a in alerts if a in ALLOWED_AREAS]
+def alert_message(alert):
+    now_str = datetime.now(TZ).strftime("%H:%M")
+    return f"התרעת פיקוד העורף: {alert.title} הנחיה: {alert.desc} *נשלח בשעה {now_str}*"
 
-        if matched_areas:
-            print("התראה רלוונטית")
-
-            tz = pytz.timezone("Asia/Jerusalem")
-            now_str = datetime.now(tz).strftime("%H:%M")
-
-            clean_title = re.sub(r'[\r\n]+', ' ', title).strip()
-            clean_desc = re.sub(r'[\r\n]+', ' ', desc).strip()
-
-            subject = f"התרעת פיקוד העורף: {title} הנחיה: {desc} *נשלח בשעה {now_str}*"
-
-
-
-            send_email(subject)
-            return "alert"
-
-        else:
-            print("🔕 התראה לא רלוונטית.")
-            return None
-
-    except Exception as e:
-        print(f"שגיאה בבדיקת התראות: {e}")
-        return None
 
+# שניות בין תחילת בדיקה אחת לתחילת הבאה
+POLL_INTERVAL = 30
 
 def main():
-    last_alert = ""
-    while True:
-        alert = check_alerts()
-        if alert and alert != last_alert:
-            print(f"התראה חדשה: {alert}")
-            last_alert = alert
-        else:
-            print("אין התראה חדשה.")
-        time.sleep(30)
+    poller = AlertPoller(ALLOWED_AREAS, interval=POLL_INTERVAL)
+    try:
+        while True:
+            alert = poller.poll_once()
+            if alert:
+                send_email(alert_message(alert))
+            poller.wait()
+    finally:
+        poller.close()
+        if smtp_connection is not None:
+            try:
+                smtp_connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
 
 if __name__ == "__main__":
     main()
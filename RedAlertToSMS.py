@@ -1,24 +1,15 @@
-import requests
 import time
-import json
-import logging
 from datetime import datetime
-import pytz
-import re
+from alert_poller import AlertPoller, setup_logging, SESSION, TZ
 
-logging.basicConfig(
-    filename="alerts.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s",
-    filemode="a",
-)
+setup_logging("alerts.log")
 
-ALLOWED_AREAS = {
+ALLOWED_AREAS = frozenset({
     "תל אביב - דרום העיר ויפו",
     "תל אביב - מזרח",
     "תל אביב - מרכז העיר",
     "תל אביב - עבר הירקון"
-}
+})
 
 def send_sms(message_text):
     url = "https://019sms.co.il/api"
@@ -43,7 +34,7 @@ def send_sms(message_text):
     }
 
     try:
-        response = requests.post(url, json=data, headers=headers)
+        response = SESSION.post(url, json=data, headers=headers)
         if response.status_code == 200:
             print("📱 ההודעה נשלחה בהצלחה.")
         else:
@@ -51,67 +42,26 @@ def send_sms(message_text):
     except Exception as e:
         print(f"שגיאה בביצוע בקשת SMS: {e}")
 
-def check_alerts():
-    print("בודק התראות...")
-    url = "https://www.oref.org.il/WarningMessages/alert/alerts.json"
-    headers = {"User-Agent": "Mozilla/5.0"}
+def alert_message(alert):
+    now_str = datetime.now(TZ).strftime("%H:%M")
+    return f" התרעת פיקוד העורף: {alert.title}. \nהנחיה:  {alert.desc} \n *נשלח בשעה {now_str}*"
 
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        text = response.content.decode('utf-8-sig')
-
-        with open("last_alert_raw.json", "w", encoding="utf-8") as f:
-            f.write(text)
-
-        if text.strip() in ("", "\n", "\n\n"):
-            print("🟩 אין התראה חדשה (תגובה ריקה).")
-            return None
-
-        if not (text.startswith('[') or text.startswith('{')):
-            print("⚠️ תשובה לא תקינה:", text[:50])
-            return None
-
-        logging.info(f"התקבלה התרעה חדשה:\n{text}")
-        data = json.loads(text)
-
-        title = data.get("title", "")
-        desc = data.get("desc", "")
-        alerts = data.get("data", [])
-
-        matched_areas = [a for a in alerts if a in ALLOWED_AREAS]
-
-        if matched_areas:
-            print("התראה רלוונטית")
-
-            tz = pytz.timezone("Asia/Jerusalem")
-            now_str = datetime.now(tz).strftime("%H:%M")
-
-            clean_title = re.sub(r'[\r\n]+', ' ', title).strip()
-            clean_desc = re.sub(r'[\r\n]+', ' ', desc).strip()
-
-            subject = f" התרעת פיקוד העורף: {clean_title}. \nהנחיה:  {clean_desc} \n *נשלח בשעה {now_str}*"
-
-            send_sms(subject)
-            return "alert"
-        else:
-            print("🔕 התראה לא רלוונטית.")
-            return None
-
-    except Exception as e:
-        print(f"שגיאה בבדיקת התראות: {e}")
-        return None
+# שניות בין תחילת בדיקה אחת לתחילת הבאה
+POLL_INTERVAL = 1
+# אחרי התראה ממתינים לפני הבדיקה הבאה, כדי לא לשלוח שוב את אותה התראה
+ALERT_COOLDOWN = 100
 
 def main():
-    last_alert = ""
-    while True:
-        alert = check_alerts()
-        if alert and alert != last_alert:
-            print(f"התראה חדשה: {alert}")
-            print(f"30 secs: {alert}")
-            time.sleep(100)
-        else:
-            print("אין התראה חדשה.")
-        time.sleep(1)
+    poller = AlertPoller(ALLOWED_AREAS, interval=POLL_INTERVAL)
+    try:
+        while True:
+            alert = poller.poll_once()
+            if alert:
+                send_sms(alert_message(alert))
+                time.sleep(ALERT_COOLDOWN)
+            poller.wait()
+    finally:
+        poller.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+import requests
+from requests.adapters import HTTPAdapter
+import time
+import orjson
+import codecs
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
+from collections import namedtuple
+import pytz
+import re
+import os
+
+ALERTS_URL = "https://www.oref.org.il/WarningMessages/alert/alerts.json"
+# REDALERT_DEBUG=1 מדפיס גם את ההודעות שחוזרות בכל בדיקה
+DEBUG = bool(os.environ.get("REDALERT_DEBUG"))
+# עותק של התשובה האחרונה שהשתנתה, לבדיקות ידניות
+RAW_FILE = "last_alert_raw.json"
+
+# חיבור אחד שנשמר פתוח (keep-alive) לכל הבקשות, במקום לחיצת TLS חדשה בכל בדיקה
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+
+TZ = pytz.timezone("Asia/Jerusalem")
+NEWLINES_RE = re.compile(r'[\r\n]+')
+# השדה data בגוף התשובה – רשימת האזורים בלבד, בלי שאר ה-JSON
+DATA_RE = re.compile(rb'"data"\s*:\s*(\[[^\]]*\])')
+
+# התראה רלוונטית: כותרת והנחיה (בשורה אחת) והאזורים המוגדרים שנכללו בה
+Alert = namedtuple("Alert", ["title", "desc", "areas"])
+
+
+def setup_logging(filename="alerts.log"):
+    """רושם לוגים לקובץ דרך תור – הכתיבה לדיסק נעשית ב-thread נפרד ולא בלולאת הבדיקה"""
+    file_handler = logging.FileHandler(filename, mode="a", encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    # מרוקן את התור לקובץ ביציאה מהתוכנית
+    atexit.register(listener.stop)
+    return listener
+
+
+def extract_areas(body):
+    """מחזיר את רשימת האזורים מתוך body בלי לפענח את כל ה-JSON, או None אם לא הצליח"""
+    match = DATA_RE.search(body)
+    if not match:
+        return None
+    try:
+        return orjson.loads(match.group(1))
+    except orjson.JSONDecodeError:
+        return None
+
+
+class AlertPoller:
+    """בודק את קובץ ההתראות של פיקוד העורף ומחזיר התראות לאזורים שהוגדרו"""
+
+    def __init__(self, allowed_areas, interval=1, url=ALERTS_URL, session=SESSION):
+        self.allowed_areas = frozenset(allowed_areas)
+        # אותם אזורים בקידוד UTF-8, לחיפוש מהיר בגוף התשובה לפני הפענוח
+        self.allowed_bytes = [a.encode("utf-8") for a in self.allowed_areas]
+        self.interval = interval
+        self.url = url
+        self.session = session
+        # ETag / Last-Modified של התשובה האחרונה, לבקשות מותנות
+        self.last_etag = None
+        self.last_modified = None
+        # גוף התשובה האחרונה, כדי לא לפענח שוב תוכן זהה
+        self.last_body = None
+        self.last_poll = time.monotonic()
+        # המצב האחרון שהודפס – מדפיסים רק כשהוא משתנה
+        self.last_state = None
+
+    def report(self, state, *message):
+        if DEBUG or state != self.last_state:
+            print(*message)
+        self.last_state = state
+
+    def poll_once(self):
+        self.last_poll = time.monotonic()
+        if DEBUG:
+            print("בודק התראות...")
+        headers = {}
+        # שולחים את המזהים מהתשובה הקודמת – אם הקובץ לא השתנה השרת יחזיר 304 בלי גוף
+        if self.last_etag:
+            headers["If-None-Match"] = self.last_etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                if DEBUG:
+                    print("🟩 אין שינוי מאז הבדיקה הקודמת.")
+                return None
+            self.last_etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+
+            # השוואת bytes בודקת קודם את האורך ורק אז את התוכן (memcmp),
+            # כך שאין צורך לחשב טביעת אצבע על כל התשובה
+            if response.content == self.last_body:
+                if DEBUG:
+                    print("🟩 אין שינוי מאז הבדיקה הקודמת.")
+                return None
+            self.last_body = response.content
+
+            # orjson מפענח bytes ישירות, כך שאין צורך לפענח קודם למחרוזת
+            body = response.content
+            if body.startswith(codecs.BOM_UTF8):
+                body = body[len(codecs.BOM_UTF8):]
+
+            # שמירת התשובה לקובץ – רק כשהתוכן השתנה. כותבים לקובץ זמני ומחליפים,
+            # כך שמי שקורא את הקובץ במקביל לא יראה אותו חצי כתוב
+            tmp_path = RAW_FILE + ".tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, RAW_FILE)
+            except OSError as e:
+                # הקובץ לבדיקות בלבד – כישלון בכתיבה (למשל קובץ נעול ב-Windows) לא עוצר את הטיפול בהתראה
+                print(f"⚠️ שגיאה בשמירת {RAW_FILE}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+            if not body.strip():
+                self.report("empty", "🟩 אין התראה חדשה (תגובה ריקה).")
+                return None
+
+            if not body.startswith((b'[', b'{')):
+                self.report("invalid", "⚠️ תשובה לא תקינה:", body[:50].decode('utf-8', 'replace'))
+                return None
+
+            # הפענוח למחרוזת רק כשהלוג באמת נכתב
+            if logging.getLogger().isEnabledFor(logging.INFO):
+                logging.info("התקבלה התרעה חדשה:\n%s", body.decode('utf-8'))
+
+            # סינון מהיר: אם אף אזור מוגדר לא מופיע בתשובה, אין צורך לפענח את ה-JSON.
+            # כשיש בתשובה תווי escape (עברית כ-\uXXXX, או \" כמו ב-חב\"ד) החיפוש לא אמין,
+            # ולכן במקרה כזה מדלגים עליו
+            if b"\\" not in body and not any(a in body for a in self.allowed_bytes):
+                self.report("irrelevant", "🔕 התראה לא רלוונטית.")
+                return None
+
+            # מפענחים קודם רק את רשימת האזורים; את כל ה-JSON רק אם יש התאמה
+            data = None
+            alerts = extract_areas(body)
+            if alerts is None:
+                data = orjson.loads(body)
+                alerts = data.get("data", [])
+
+            # החיתוך נעשה כולו בקוד ה-C של set, בלי לולאה בפייתון
+            matched_areas = sorted(self.allowed_areas.intersection(alerts))
+
+            if not matched_areas:
+                self.report("irrelevant", "🔕 התראה לא רלוונטית.")
+                return None
+
+            if data is None:
+                data = orjson.loads(body)
+            # "or" ולא ברירת מחדל של get – השדות עשויים להגיע כ-null
+            title = NEWLINES_RE.sub(' ', data.get("title") or "").strip()
+            desc = NEWLINES_RE.sub(' ', data.get("desc") or "").strip()
+
+            # כל התראה רלוונטית מודפסת, גם כשהקודמת הייתה רלוונטית
+            print("התראה רלוונטית")
+            self.last_state = "alert"
+            return Alert(title, desc, matched_areas)
+
+        except Exception as e:
+            # התשובה לא טופלה עד הסוף – שוכחים אותה ואת המזהים שלה, כדי שהבקשה הבאה
+            # לא תקבל 304 והתשובה תטופל שוב
+            self.last_body = None
+            self.last_etag = None
+            self.last_modified = None
+            self.report(("error", str(e)), f"שגיאה בבדיקת התראות: {e}")
+            return None
+
+    def time_until_next(self):
+        # זמן הבקשה עצמה מנוכה מההמתנה, כך שבקשה איטית לא מאטה את קצב הבדיקות
+        return max(0, self.interval - (time.monotonic() - self.last_poll))
+
+    def wait(self):
+        time.sleep(self.time_until_next())
+
+    def close(self):
+        # סוגר את החיבורים הפתוחים ביציאה מהתוכנית
+        self.session.close()